@@ -19,16 +19,70 @@ License:
 
 Notes for Future Development:
     - Consider having all paths elsewhere.
+    - The catalog can be shipped as Parquet for faster loading: pd.read_csv(csv_path).to_parquet(parquet_path), keeping
+      the same file name next to the CSV.
 """
 
-import pandas as pd
-import os
+import csv
+import functools
+from pathlib import Path
 
 # Paths to configuration
-config_folder_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))), 'config')
-objective_list_csv_path = os.path.join(config_folder_path, 'B_Raman_Objectives_List.csv')
+config_folder_path = Path(__file__).resolve().parents[4] / 'config'
+objective_list_csv_path = config_folder_path / 'B_Raman_Objectives_List.csv'
+
+
+@functools.lru_cache(maxsize=None)
+def _load_objective_table(file_path):
+    """
+    Reads the objective catalog once per process and indexes it by name.
+
+    If a Parquet copy of the catalog exists next to the CSV file (same name, '.parquet' extension), is not older than
+    the CSV and pyarrow is installed, the binary copy is read instead of parsing the CSV. The CSV is the source of
+    truth, so a Parquet copy left behind after editing the CSV is ignored.
+
+    Args:
+        file_path (str or Path): Path to the CSV file containing objective configurations.
+
+    Returns:
+        dict: A dictionary mapping each objective name to a dictionary with its properties.
+    """
+    columns = ['Name', 'Maker', 'Magnification', 'NA', 'WD', 'Immersion', 'Tube_Lens_Design']
+    parquet_path = Path(file_path).with_suffix('.parquet')
+    if parquet_path.is_file() and parquet_path.stat().st_mtime >= Path(file_path).stat().st_mtime:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            pass
+        else:
+            return {row.pop('Name'): row for row in pq.read_table(parquet_path, columns=columns).to_pylist()}
+    with open(file_path, newline='') as f:
+        return {row['Name']: {column: row[column] for column in columns[1:]} for row in csv.DictReader(f)}
+
+def _objective_table(file_path):
+    """
+    Returns the (cached) objective catalog, reporting a missing catalog file with its path.
+
+    Args:
+        file_path (str or Path): Path to the CSV file containing objective configurations.
+
+    Returns:
+        dict: A dictionary mapping each objective name to a dictionary with its properties.
+
+    Raises:
+        FileNotFoundError: If the specified CSV file cannot be found.
+    """
+    try:
+        return _load_objective_table(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f'Objective catalog not found at {file_path}') from None
+
+# Shared instances handed out by BRamanObjective.get(), keyed by name
+_objective_cache = {}
 
 class BRamanObjective:
+    __slots__ = ('_name', '_magnification', '_maker', '_WD', '_NA', '_f_tube_lens_design', '_immersion', '_metadata')
+
     def __init__(self, name, maker=None, magnification=None, NA=None, WD=None, immersion=None, f_tube_lens_design=None):
         """
         Initializes a BRamanObjective instance with specified or default properties.
@@ -49,8 +103,27 @@ class BRamanObjective:
         self._NA = NA
         self._f_tube_lens_design = f_tube_lens_design  # Design Tube lens focal distance in mm
         self._immersion = immersion
+        self._metadata = None  # Built on first access, see the metadata property
         self.set_objective_from_name(self._name)
-        self._metadata = self.set_metadata()
+
+    @classmethod
+    def get(cls, name):
+        """
+        Returns a shared BRamanObjective instance for the given name, creating it on first use.
+
+        Instances returned by this method are shared between all callers. Modifying one with a setter removes it from
+        the shared instances, so later calls build a fresh one from the catalog; use BRamanObjective(name) for a private copy.
+
+        Args:
+            name (str): The name of the objective.
+
+        Returns:
+            BRamanObjective: The shared instance for that objective.
+        """
+        instance = _objective_cache.get(name)
+        if instance is None:
+            instance = _objective_cache[name] = cls(name)
+        return instance
 
     def set_objective_from_name(self, name, file_path=objective_list_csv_path):
         """
@@ -58,31 +131,102 @@ class BRamanObjective:
 
         Args:
             name (str): The name of the objective to look up.
-            file_path (str): Path to the CSV file containing objective configurations.
+            file_path (str or Path): Path to the CSV file containing objective configurations.
 
         Raises:
             FileNotFoundError: If the specified CSV file cannot be found.
             Exception: If the objective name is not found in the database.
         """
         # Implementation for setting objective based on the name
-        # read the csv file
+        # read the (cached) objective catalog
+        table = _objective_table(file_path)
+
         try:
-            df = pd.read_csv(file_path)
-        except FileNotFoundError:
-            print(f"The file containing the objective information was not found in {file_path}. Please check the filename and try again.")
-            raise
-
-        # check if the name exists in the 'name' column
-        if name in df['Name'].values:
-            df = df[df['Name'] == name]
-            self._magnification =  float(df['Magnification'].values[0])
-            self._NA = float(df['NA'].values[0])
-            self._maker = df['Maker'].values[0]
-            self._WD = float(df['WD'].values[0]) # Working distance in mm
-            self._f_tube_lens_design = float(df['Tube_Lens_Design'].values[0])  # Design tube lens focal distance in mm
-            self._immersion = df['Immersion'].values[0]
-        else:
-            raise Exception(f'Objective name {name} is not in the database')
+            row = table[name]
+        except KeyError:
+            raise Exception(f'Objective name {name} is not in the database') from None
+        self._set_from_row(row)
+
+    def _set_from_row(self, row):
+        """
+        Sets the objective properties from a catalog row.
+
+        Args:
+            row (dict): The catalog entry of the objective, as returned by _load_objective_table.
+        """
+        self._magnification = float(row['Magnification'])
+        self._NA = float(row['NA'])
+        self._maker = row['Maker']
+        self._WD = float(row['WD']) # Working distance in mm
+        self._f_tube_lens_design = float(row['Tube_Lens_Design'])  # Design tube lens focal distance in mm
+        self._immersion = row['Immersion']
+        self._invalidate()
+
+    @classmethod
+    def _from_row(cls, name, row):
+        """
+        Creates an objective directly from its catalog row, without looking it up again.
+
+        Args:
+            name (str): The name of the objective.
+            row (dict): The catalog entry of the objective.
+
+        Returns:
+            BRamanObjective: The new objective.
+        """
+        objective = cls.__new__(cls)
+        objective._name = name
+        objective._set_from_row(row)
+        return objective
+
+    @classmethod
+    def load_many(cls, names, file_path=objective_list_csv_path):
+        """
+        Creates several objectives with a single catalog lookup.
+
+        Args:
+            names (iterable of str): The names of the objectives.
+            file_path (str or Path): Path to the CSV file containing objective configurations.
+
+        Returns:
+            list: The BRamanObjective instances, in the same order as `names`.
+
+        Raises:
+            FileNotFoundError: If the specified CSV file cannot be found.
+            Exception: If any of the objective names is not found in the database.
+        """
+        table = _objective_table(file_path)
+        names = list(names)
+        # Validate every name up front (dict keys view membership is O(1)) so nothing is built for a bad request
+        missing = set(names) - table.keys()
+        if missing:
+            raise Exception(f'Objective names {sorted(missing)} are not in the database')
+        return [cls._from_row(name, table[name]) for name in names]
+
+    @classmethod
+    def load_all(cls, file_path=objective_list_csv_path):
+        """
+        Creates one objective for every entry of the catalog.
+
+        Args:
+            file_path (str or Path): Path to the CSV file containing objective configurations.
+
+        Returns:
+            list: The BRamanObjective instances, in catalog order.
+
+        Raises:
+            FileNotFoundError: If the specified CSV file cannot be found.
+        """
+        return [cls._from_row(name, row) for name, row in _objective_table(file_path).items()]
+
+    def _invalidate(self):
+        """
+        Drops the cached metadata after a property change. If this is the shared instance handed out by `get`, it is
+        also removed from the shared instances, so the change does not leak to later `get` callers.
+        """
+        self._metadata = None
+        if _objective_cache.get(self._name) is self:
+            del _objective_cache[self._name]
 
     def set_metadata(self):
         """
@@ -94,9 +238,17 @@ class BRamanObjective:
         # Implementation for setting metadata
         metadata = dict(Objective=self._name, Objective_Maker=self._maker, Objective_Magnification=self._magnification, Objective_NA=self._NA,
                              Objective_WD=self._WD, Objective_Immersion=self._immersion, Objective_Tube_Lens_f=self._f_tube_lens_design)
-        self._metadata = metadata
         return metadata
 
+    @property
+    def metadata(self):
+        """
+        The metadata dictionary for the objective, built on first access and reused until a property changes.
+        """
+        if self._metadata is None:
+            self._metadata = self.set_metadata()
+        return self._metadata
+
     def get_metadata(self):
         """
         Retrieves the metadata dictionary for the objective.
@@ -104,134 +256,125 @@ class BRamanObjective:
         Returns:
             dict: A dictionary containing the objective's metadata.
         """
-        return self._metadata
-
-
-def get_name(self):
-    """
-    Retrieves the name of the objective.
-
-    Returns:
-        str: The name of the objective.
-    """
-    return self._name
-
-def set_name(self, name):
-    """
-    Sets the name of the objective.
+        return self.metadata
 
-    Args:
-        name (str): The new name for the objective.
-    """
-    self._name = name
+    @property
+    def name(self):
+        """str: The name of the objective."""
+        return self._name
 
-def get_magnification(self):
-    """
-    Retrieves the magnification factor of the objective.
+    @property
+    def magnification(self):
+        """float: The magnification factor of the objective."""
+        return self._magnification
 
-    Returns:
-        float: The magnification factor of the objective.
-    """
-    return self._magnification
+    @property
+    def NA(self):
+        """float: The numerical aperture of the objective."""
+        return self._NA
 
-def set_magnification(self, magnification):
-    """
-    Sets the magnification factor of the objective.
+    def get_name(self):
+        """
+        Retrieves the name of the objective.
 
-    Args:
-        magnification (float): The new magnification factor for the objective.
-    """
-    self._magnification = magnification
+        Returns:
+            str: The name of the objective.
+        """
+        return self._name
 
-def get_maker(self):
-    """
-    Retrieves the manufacturer of the objective.
+    def get_magnification(self):
+        """
+        Retrieves the magnification factor of the objective.
 
-    Returns:
-        str: The manufacturer of the objective.
-    """
-    return self._maker
+        Returns:
+            float: The magnification factor of the objective.
+        """
+        return self._magnification
 
-def set_maker(self, maker):
-    """
-    Sets the manufacturer of the objective.
+    def get_maker(self):
+        """
+        Retrieves the manufacturer of the objective.
 
-    Args:
-        maker (str): The new manufacturer for the objective.
-    """
-    self._maker = maker
+        Returns:
+            str: The manufacturer of the objective.
+        """
+        return self._maker
 
-def get_NA(self):
-    """
-    Retrieves the numerical aperture (NA) of the objective.
+    def set_maker(self, maker):
+        """
+        Sets the manufacturer of the objective.
 
-    Returns:
-        float: The numerical aperture of the objective.
-    """
-    return self._NA
+        Args:
+            maker (str): The new manufacturer for the objective.
+        """
+        self._maker = maker
+        self._invalidate()
 
-def set_NA(self, NA):
-    """
-    Sets the numerical aperture (NA) of the objective.
+    def get_NA(self):
+        """
+        Retrieves the numerical aperture (NA) of the objective.
 
-    Args:
-        NA (float): The new numerical aperture for the objective.
-    """
-    self._NA = NA
+        Returns:
+            float: The numerical aperture of the objective.
+        """
+        return self._NA
 
-def get_WD(self):
-    """
-    Retrieves the working distance (WD) of the objective in millimeters.
+    def get_WD(self):
+        """
+        Retrieves the working distance (WD) of the objective in millimeters.
 
-    Returns:
-        float: The working distance of the objective.
-    """
-    return self._WD
+        Returns:
+            float: The working distance of the objective.
+        """
+        return self._WD
 
-def set_WD(self, WD):
-    """
-    Sets the working distance (WD) of the objective.
+    def set_WD(self, WD):
+        """
+        Sets the working distance (WD) of the objective.
 
-    Args:
-        WD (float): The new working distance for the objective, in millimeters.
-    """
-    self._WD = WD
+        Args:
+            WD (float): The new working distance for the objective, in millimeters.
+        """
+        self._WD = WD
+        self._invalidate()
 
-def get_f_tube_lens_design(self):
-    """
-    Retrieves the designed focal length of the tube lens used with the objective in millimeters.
+    def get_f_tube_lens_design(self):
+        """
+        Retrieves the designed focal length of the tube lens used with the objective in millimeters.
 
-    Returns:
-        float: The designed focal length of the tube lens.
-    """
-    return self._f_tube_lens_design
+        Returns:
+            float: The designed focal length of the tube lens.
+        """
+        return self._f_tube_lens_design
 
-def set_f_tube_lens_design(self, f_tube_lens_design):
-    """
-    Sets the designed focal length of the tube lens used with the objective.
+    def set_f_tube_lens_design(self, f_tube_lens_design):
+        """
+        Sets the designed focal length of the tube lens used with the objective.
 
-    Args:
-        f_tube_lens_design (float): The new designed focal length for the tube lens, in millimeters.
-    """
-    self._f_tube_lens_design = f_tube_lens_design
+        Args:
+            f_tube_lens_design (float): The new designed focal length for the tube lens, in millimeters.
+        """
+        self._f_tube_lens_design = f_tube_lens_design
+        self._invalidate()
 
-def get_immersion(self):
-    """
-    Retrieves the type of immersion medium used with the objective.
+    def get_immersion(self):
+        """
+        Retrieves the type of immersion medium used with the objective.
 
-    Returns:
-        str: The type of immersion medium.
-    """
-    return self._immersion
+        Returns:
+            str: The type of immersion medium.
+        """
+        return self._immersion
 
-def set_immersion(self, immersion):
-    """
-    Sets the type of immersion medium used with the objective.
+    def set_immersion(self, immersion):
+        """
+        Sets the type of immersion medium used with the objective.
 
-    Args:
-        immersion (str): The new immersion medium for the objective.
-    """
-    self._immersion = immersion
+        Args:
+            immersion (str): The new immersion medium for the objective.
+        """
+        self._immersion = immersion
+        self._invalidate()
 
 
 if __name__ == '__main__':
@@ -1,13 +1,38 @@
+import functools
+import os
 from abc import ABC, abstractmethod
 
+import pandas as pd
+
+calibration_folder_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'B_Raman_Calibration')
+
+
+@functools.lru_cache(maxsize=4)
+def _load_calibration(spectro_model, exc_wl_nm):
+    """
+    Reads the pixel to wavelength/wavenumber calibration of a spectrometer once per process.
+
+    Args:
+        spectro_model (str): The spectrometer model (e.g. 'EAGLE').
+        exc_wl_nm (float): The excitation wavelength in nm.
+
+    Returns:
+        pandas.DataFrame: The calibration table without the 'Excitation' column. It is shared between calls, so it
+        must not be modified in place.
+
+    Raises:
+        Exception: If there is no calibration for the spectrometer model and excitation wavelength.
+    """
+    if spectro_model == 'EAGLE' and exc_wl_nm == 785:
+        file_path = os.path.join(calibration_folder_path, 'EAGLE_PixeltoLambdatoCM_1.csv')
+    else:
+        raise Exception(f'Unrecognized spectrometer model {spectro_model}')
+    # Skip the 'Excitation' column at parse time instead of dropping it afterwards
+    return pd.read_csv(file_path, usecols=lambda column: column != 'Excitation')
+
+
 class BRamanSpectrometerController(ABC):
     pass
 
     def get_spectrum_df(self):
-        if self.spectro_model == 'EAGLE' and self.exc_wl_nm == 785:
-            df = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)),'./B_Raman_Calibration/EAGLE_PixeltoLambdatoCM_1.csv'))
-            df['Intensity'] = self.get_raw_spectrum()
-            df = df.drop('Excitation', axis=1)
-        else:
-            raise Exception(f'Unrecognized spectrometer model {self.spectro_model}')
-        return df
\ No newline at end of file
+        return _load_calibration(self.spectro_model, self.exc_wl_nm).assign(Intensity=self.get_raw_spectrum())
@@ -18,15 +18,51 @@ License:
 
 Notes for Future Development:
     - Consider having all paths elsewhere.
+    - The catalog can be shipped as Parquet for faster loading: pd.read_csv(csv_path).to_parquet(parquet_path), keeping
+      the same file name next to the CSV.
 """
 
-import pandas as pd
-import os
+import csv
+import functools
+from pathlib import Path
 
-config_folder_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))), 'config')
-tube_lens_list_csv_path = os.path.join(config_folder_path, 'B_Raman_Tube_Lens_List.csv')
+config_folder_path = Path(__file__).resolve().parents[4] / 'config'
+tube_lens_list_csv_path = config_folder_path / 'B_Raman_Tube_Lens_List.csv'
+
+
+@functools.lru_cache(maxsize=None)
+def _load_tube_lens_table(file_path):
+    """
+    Reads the tube lens catalog once per process and indexes it by name.
+
+    If a Parquet copy of the catalog exists next to the CSV file (same name, '.parquet' extension), is not older than
+    the CSV and pyarrow is installed, the binary copy is read instead of parsing the CSV. The CSV is the source of
+    truth, so a Parquet copy left behind after editing the CSV is ignored.
+
+    Args:
+        file_path (str or Path): Path to the CSV file containing tube lens configurations.
+
+    Returns:
+        dict: A dictionary mapping each tube lens name to a dictionary with its properties.
+    """
+    columns = ['Name', 'Maker', 'Magnification', 'Focal_Length']
+    parquet_path = Path(file_path).with_suffix('.parquet')
+    if parquet_path.is_file() and parquet_path.stat().st_mtime >= Path(file_path).stat().st_mtime:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            pass
+        else:
+            return {row.pop('Name'): row for row in pq.read_table(parquet_path, columns=columns).to_pylist()}
+    with open(file_path, newline='') as f:
+        return {row['Name']: {column: row[column] for column in columns[1:]} for row in csv.DictReader(f)}
+
+# Shared instances handed out by BRamanTubeLens.get(), keyed by name
+_tube_lens_cache = {}
 
 class BRamanTubeLens:
+    __slots__ = ('_name', '_magnification', '_maker', '_focal_length', '_metadata')
+
     def __init__(self, name, maker=None, magnification=None, focal_length=None):
         """
         Initializes a BRamanTubeLens instance with specified or default properties.
@@ -41,8 +77,27 @@ class BRamanTubeLens:
         self._magnification = magnification
         self._maker = maker
         self._focal_length = focal_length  # Tube lens focal distance in mm
+        self._metadata = None  # Built on first access, see the metadata property
         self.set_tube_lens_from_name(self._name)
-        self._metadata = self.set_metadata()
+
+    @classmethod
+    def get(cls, name):
+        """
+        Returns a shared BRamanTubeLens instance for the given name, creating it on first use.
+
+        Instances returned by this method are shared between all callers. Modifying one with a setter removes it from
+        the shared instances, so later calls build a fresh one from the catalog; use BRamanTubeLens(name) for a private copy.
+
+        Args:
+            name (str): The name of the tube lens.
+
+        Returns:
+            BRamanTubeLens: The shared instance for that tube lens.
+        """
+        instance = _tube_lens_cache.get(name)
+        if instance is None:
+            instance = _tube_lens_cache[name] = cls(name)
+        return instance
 
 
     def set_tube_lens_from_name(self, name, file_path=tube_lens_list_csv_path):
@@ -51,26 +106,35 @@ class BRamanTubeLens:
 
         Args:
             name (str): The name of the tube lens to look up.
-            file_path (str): Path to the CSV file containing tube lens configurations.
+            file_path (str or Path): Path to the CSV file containing tube lens configurations.
 
         Raises:
             FileNotFoundError: If the specified CSV file cannot be found.
             Exception: If the tube lens name is not found in the database.
         """
         try:
-            df = pd.read_csv(file_path)
+            table = _load_tube_lens_table(file_path)
         except FileNotFoundError:
-            print(f"The file containing the laser information was not found in {file_path}. Please check the filename and try again.")
-            raise
-
-        if name in df['Name'].values:
-            df = df[df['Name'] == name]
-            self._magnification = float(df['Magnification'].values[0])
-            self._maker = df['Maker'].values[0]
-            self._focal_length = float(df['Focal_Length'].values[0])  # Tube lens focal distance in mm
-        else:
-            raise Exception(f'Tube lens name {name} is not in the database')
+            raise FileNotFoundError(f'Tube lens catalog not found at {file_path}') from None
+
+        try:
+            row = table[name]
+        except KeyError:
+            raise Exception(f'Tube lens name {name} is not in the database') from None
+        self._magnification = float(row['Magnification'])
+        self._maker = row['Maker']
+        self._focal_length = float(row['Focal_Length'])  # Tube lens focal distance in mm
+        self._invalidate()
+
 
+    def _invalidate(self):
+        """
+        Drops the cached metadata after a property change. If this is the shared instance handed out by `get`, it is
+        also removed from the shared instances, so the change does not leak to later `get` callers.
+        """
+        self._metadata = None
+        if _tube_lens_cache.get(self._name) is self:
+            del _tube_lens_cache[self._name]
 
     def set_metadata(self):
         """
@@ -80,9 +144,17 @@ class BRamanTubeLens:
             dict: A dictionary containing metadata about the tube lens, including its name, maker, magnification, and focal length.
         """
         metadata = dict(Tube_Lens=self._name, Tube_Lens_Maker=self._maker, Tube_Lens_Magnification=self._magnification, Tube_Lens_Focal_Length=self._focal_length)
-        self._metadata = metadata
         return metadata
 
+    @property
+    def metadata(self):
+        """
+        The metadata dictionary for the tube lens, built on first access and reused until a property changes.
+        """
+        if self._metadata is None:
+            self._metadata = self.set_metadata()
+        return self._metadata
+
 
     def get_metadata(self):
         """
@@ -91,7 +163,7 @@ class BRamanTubeLens:
         Returns:
             dict: A dictionary containing the tube lens's metadata, including its name, maker, magnification, and focal length.
         """
-        return self._metadata
+        return self.metadata
 
     def get_name(self):
         """
@@ -109,6 +181,7 @@ class BRamanTubeLens:
         Args:
             name (str): The new name for the tube lens.
         """
+        self._invalidate() # Under the old name
         self._name = name
 
     def get_magnification(self):
@@ -128,6 +201,7 @@ class BRamanTubeLens:
             magnification (float): The new magnification factor for the tube lens.
         """
         self._magnification = magnification
+        self._invalidate()
 
     def get_maker(self):
         """
@@ -146,6 +220,7 @@ class BRamanTubeLens:
             maker (str): The new manufacturer for the tube lens.
         """
         self._maker = maker
+        self._invalidate()
 
     def get_focal_length(self):
         """
@@ -164,6 +239,7 @@ class BRamanTubeLens:
             focal_length (float): The new focal length for the tube lens, in millimeters.
         """
         self._focal_length = focal_length
+        self._invalidate()
 
 
 
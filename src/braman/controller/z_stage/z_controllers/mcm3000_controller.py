@@ -24,9 +24,20 @@ You should have received a copy of the GNU General Public License along with thi
 
 Notes for development:
     - Improve the issue of the minimum motion and the finish move, sometimes it stops close to the target but not exactly there, and then waiting for the finish move it gets stuck
+    - The serial port is deliberately kept in the calling process. pyserial releases the GIL while it blocks in
+      read/write, so other threads (e.g. camera acquisition) keep running during a transaction, whereas a worker
+      process would add two queue hops (pickling + pipe) to every 12-byte encoder query. To keep the caller free while
+      the stage moves, use move_um(..., block=False) and wait with finish_move_async.
 """
 
 
+import asyncio
+import contextlib
+import logging
+import math
+import struct
+import sys
+import threading
 import time
 import serial
 
@@ -36,6 +47,13 @@ supported_stages = { # 'Type': (+-stage_limit_um, stage_conversion_um) from MCM3
     #'ZFM2030':(1e3 * 12.7, 0.2116667),
 }
 
+# Encoder value reply (12 bytes): 6 header bytes, channel byte, 1 byte, signed 32-bit little-endian encoder value
+_encoder_reply = struct.Struct('<6xcxi')
+# Channel command (12 bytes): 6 header bytes, unsigned 16-bit channel, signed 32-bit encoder value (all little-endian)
+_channel_cmd = struct.Struct('<6sHi')
+_move_cmd_header = b'\x53\x04\x06\x00\x00\x00'
+_set_encoder_cmd_header = b'\x09\x04\x06\x00\x00\x00'
+
 
 class MCM3000Controller:
     """
@@ -49,8 +67,8 @@ class MCM3000Controller:
     Attributes:
         name (str): Name of the controller.
         supported_stages (dict): A dictionary mapping stage names to their specifications.
-        verbose (bool): If True, prints basic operation info to the terminal.
-        very_verbose (bool): If True, prints extended operation info to the terminal.
+        verbose (bool): If True, logs basic operation info (INFO level).
+        very_verbose (bool): If True, also logs extended operation info (DEBUG level).
         stages (tuple): Names of the stage types for each channel.
         channels (tuple): Labels of each control channel.
         reverse (tuple): Indicates if the motion direction for each axis is reversed.
@@ -61,11 +79,13 @@ class MCM3000Controller:
         _stage_lower_limit_um (list): Lower motion limit for each stage, in micrometers.
         _stage_lowest_scan_point_um (list): Safe lower bound for scanning, to avoid damaging the sample.
         _stage_highest_scan_point_um (list): Safe upper bound for scanning.
+        _effective_limits (list): Bounds used to legalize moves for each stage (scan points, or limits if unset).
         _stage_retract_point_um (list): Retract points before engaging in X-Y motion.
         _min_encoder_motion (int): Minimum number of encoder counts required for motion to be recognized.
         _stage_conversion_um (list): Conversion factors from encoder counts to micrometers for each stage.
         _current_encoder_value (list): Current encoder values for each channel.
         _pending_encoder_value (list): Target encoder values during motion, becomes None when motion finishes.
+        _pending_mask (int): Bit mask of the internal channels with a move in progress (bit idx set while moving).
 
     Raises:
         IOError: If no connection can be established on the provided port.
@@ -89,20 +109,35 @@ class MCM3000Controller:
             stages (tuple, optional): Names of the stage types for each channel. Defaults to (None, None, None).
             reverse (tuple, optional): Indicates if the motion direction for each axis is reversed. Defaults to (False, False, False).
             channels (tuple, optional): Labels of each control channel, should be in the order (1, 2, 3). Defaults to (1, 2, 3).
-            verbose (bool, optional): If True, prints basic operation info to the terminal. Defaults to True.
-            very_verbose (bool, optional): If True, prints extended operation info to the terminal. Defaults to False.
+            verbose (bool, optional): If True, logs basic operation info (INFO level), printed to the terminal unless logging is configured.
+                Per-call `verbose` flags print their output either way. Defaults to True.
+            very_verbose (bool, optional): If True, also logs extended operation info (DEBUG level). Defaults to False.
         """
         self.name = name
         self.supported_stages = supported_stages
         self.verbose = verbose
         self.very_verbose = very_verbose
-        if self.verbose: print(f"{self.name}: opening...", end='')
+        # Operation info goes through a per-instance logger: verbose -> INFO, very_verbose -> DEBUG
+        self._log = logging.getLogger(f'{__name__}.{name}.{port}')
+        self._log.setLevel(logging.DEBUG if very_verbose else logging.INFO if verbose else logging.WARNING)
+        if (verbose or very_verbose) and not self._log.hasHandlers(): # Print to the terminal unless logging is already configured
+            self._log.addHandler(logging.StreamHandler(sys.stdout))
+        self._log.info('%s: opening...', self.name)
         try:
-            self.port = serial.Serial(port=port, baudrate=460800)
+            self.port = serial.Serial(port=port, baudrate=460800, timeout=0.05) # Bounded reads, see _read
         except serial.serialutil.SerialException:
             raise IOError(
                 f'{self.name}: no connection on port {port}')
-        if self.verbose: print("done.")
+        # The USB-serial latency timer (16 ms by default on FTDI chips), not the baud rate, bounds every command/reply round trip
+        if sys.platform.startswith('linux'): # pyserial sets the latency timer to 1 ms (Linux only, other POSIX raise NotImplementedError)
+            try:
+                self.port.set_low_latency_mode(True)
+            except (IOError, ValueError, NotImplementedError):
+                self._log.warning('%s: could not enable low latency mode on port %s', self.name, port)
+        elif sys.platform == 'win32':
+            self._log.info('%s: for faster polling set the latency timer of %s to 1 ms '
+                           '(Device Manager -> Port Settings -> Advanced -> Latency Timer)', self.name, port)
+        self._log.info('%s: opening... done.', self.name)
         assert type(stages) == tuple and type(reverse) == tuple and type(channels) == tuple, (f'{self.name}: stages, reverse and channels must be a tuple, currently {type(stages)}, {type(reverse)}, {type(channels)}')
         assert len(stages) == 3 and len(reverse) == 3 and len(channels) == 3, (f'{self.name}: stages, reverse and channels must be a tuple of 3 elements, currently {len(stages)}, {len(reverse)}, {len(channels)}')
         for element in reverse: assert type(element) == bool, (f'{self.name}: reverse must be a tuple of booleans')
@@ -111,50 +146,96 @@ class MCM3000Controller:
         self.stages = stages
         self.channels = channels
         self._internal_channels = (0, 1, 2) # This is for internal use
-        self._internal_channels_dict = dict(zip(self.channels, self._internal_channels)) #This is for internal use
+        # This is for internal use. A dict rather than `channel - 1` list indexing, because channel labels are user
+        # defined (not necessarily 1, 2, 3) and a list would silently accept a wrong label such as 0 or -1
+        self._internal_channels_dict = dict(zip(self.channels, self._internal_channels))
+        # Serial commands that only depend on the channel are built once (indexed like the internal channels)
+        self._channel_byte = [idx.to_bytes(1, byteorder='little') for idx in self._internal_channels] # As echoed in the encoder response
+        self._channel_from_byte = dict(zip(self._channel_byte, self.channels)) # Routes an encoder response to its channel
+        self._get_encoder_cmd = [b'\x0a\x04' + channel_byte + b'\x00\x00\x00' for channel_byte in self._channel_byte]
+        self._active_idx = tuple(idx for idx in self._internal_channels if stages[idx] is not None) # Channels with a stage
+        self._get_all_encoders_cmd = b''.join([self._get_encoder_cmd[idx] for idx in self._active_idx]) # See _get_all_encoder_values
+        self._zero_encoder_cmd = [_channel_cmd.pack(_set_encoder_cmd_header, idx, 0) for idx in self._internal_channels]
         self.reverse = reverse
-        self.reverse_factors = len(reverse)*[1,]
-        for ii in range(len(reverse)):
-            if self.reverse[ii]:
-                self.reverse_factors[ii] = -1
+        self.reverse_factors = [-1 if element else 1 for element in reverse]
         # The lowest and highest range of the stage
         self._stage_upper_limit_um = 3*[None]
         self._stage_lower_limit_um = 3*[None]
         # The lowest and highest scan points (i.e. the lowest point before damaging the sample being scanned)
         self._stage_lowest_scan_point_um = 3*[None]
         self._stage_highest_scan_point_um = 3*[None]
+        # The bounds that legalize a move: (lower, upper, lo, hi), with lower/upper the scan points (or the limits if
+        # unset) and lo/hi the same values sorted. Refreshed by _update_effective_limits whenever they change
+        self._effective_limits = 3*[None]
         # The level at which to retract before engaging in X-Y motion
         self._stage_retract_point_um = 3*[None]
+        # The position that retract moves to: the retract point times the reverse factor (kept in sync with it)
+        self._signed_retract_um = 3*[None]
         # The minimum number of counts that it can move (for very small motions it struggles)
         self._min_encoder_motion = 5
+        # Approximate motion time per encoder count (~6 s measured for the full ZFM2020 travel, ~120000 counts)
+        self._sec_per_count = 5e-5
+        # Shortest wait between encoder polls while finishing a move
+        self._min_polling_wait_s = 0.005
+        # Longest time to wait for a complete reply before raising
+        self._read_timeout_s = 0.5
+        # Longest time to wait for the encoder to read zero after re-setting it
+        self._zero_timeout_s = 1.0
         # Conversion factor: um/count
         self._stage_conversion_um = 3*[None]
+        # Signed conversion factor: um/count including the reverse sign, so conversions need no branching
+        self._um_per_count = 3*[None]
         self._current_encoder_value = 3*[None]
         self._pending_encoder_value = 3*[None] # Is None when all motions have finished but, while in motion, it is the target encoder value (until it is reached and becomes None)
+        self._pending_mask = 0 # Bit idx is set while _pending_encoder_value[idx] is not None
+        # Thread safety: the port lock keeps each command/reply transaction (and the shared pending mask) atomic, while a
+        # channel lock is held for a whole motion of its channel, so other channels can move and poll in the meantime
+        self._port_lock = threading.RLock()
+        self._channel_locks = [threading.RLock() for idx in self._internal_channels]
 
         for channel, stage in enumerate(stages):
             if stage is not None:
                 assert stage in self.supported_stages, (f'{self.name}: stage \'{stage}\' not supported')
+                limit_um, conversion_um = self.supported_stages[stage]
+                reverse_factor = self.reverse_factors[channel]
                 # Set lower and upper limit (these are the max and min points that the stage can physically do)
-                self._stage_upper_limit_um[channel] = self.supported_stages[stage][0]*self.reverse_factors[channel]
-                self._stage_lower_limit_um[channel] = -self.supported_stages[stage][0]*self.reverse_factors[channel]
+                self._stage_upper_limit_um[channel] = limit_um*reverse_factor
+                self._stage_lower_limit_um[channel] = -limit_um*reverse_factor
                 # Set conversion factor
-                self._stage_conversion_um[channel] = self.supported_stages[stage][1]
+                self._stage_conversion_um[channel] = conversion_um
+                self._um_per_count[channel] = conversion_um*reverse_factor
                 # Set scan points and retract points (for initializing they are just the same as max points)
-                self._stage_highest_scan_point_um[channel] = self.supported_stages[stage][0]*self.reverse_factors[channel]
-                self._stage_lowest_scan_point_um[channel] = -self.supported_stages[stage][0]*self.reverse_factors[channel]
-                self._stage_retract_point_um[channel] = self._stage_highest_scan_point_um[channel]-self._stage_conversion_um[channel]*self.reverse_factors[channel]
-                self._current_encoder_value[channel] = self._get_encoder_value(self.channels[self._internal_channels.index(channel)], True)
-
-        if self.verbose:
-            print(f'\n{self.name}: stages:', self.stages)
-            print(f'\n{self.name}: channels:', self.channels)
-            print(f'\n{self.name}: reverse:', self.reverse)
-            print(f'\n{self.name}: reverse factors', self.reverse_factors)
-            print(f'\n{self.name}: stage_upper_limit_um:', self._stage_upper_limit_um)
-            print(f'\n{self.name}: stage_lower_limit_um:', self._stage_lower_limit_um)
-            print(f'\n{self.name}: stage_conversion_um:', self._stage_conversion_um)
-            print(f'\n{self.name}: current_encoder_value:', self._current_encoder_value)
+                self._stage_highest_scan_point_um[channel] = limit_um*reverse_factor
+                self._stage_lowest_scan_point_um[channel] = -limit_um*reverse_factor
+                self._stage_retract_point_um[channel] = (limit_um - conversion_um)*reverse_factor
+                self._signed_retract_um[channel] = self._stage_retract_point_um[channel]*reverse_factor
+                self._update_effective_limits(channel)
+                self._current_encoder_value[channel] = self._get_encoder_value(self.channels[channel], self.verbose)
+
+        self._log.info('%s: stages: %s', self.name, self.stages)
+        self._log.info('%s: channels: %s', self.name, self.channels)
+        self._log.info('%s: reverse: %s', self.name, self.reverse)
+        self._log.info('%s: reverse factors: %s', self.name, self.reverse_factors)
+        self._log.info('%s: stage_upper_limit_um: %s', self.name, self._stage_upper_limit_um)
+        self._log.info('%s: stage_lower_limit_um: %s', self.name, self._stage_lower_limit_um)
+        self._log.info('%s: stage_conversion_um: %s', self.name, self._stage_conversion_um)
+        self._log.info('%s: current_encoder_value: %s', self.name, self._current_encoder_value)
+
+    def _log_verbose(self, msg, *args):
+        """
+        Logs the output requested with a per-call `verbose` flag.
+
+        It is logged at INFO level if the controller logger emits it, otherwise (a controller with verbose=False) it is
+        printed to the terminal, so a per-call `verbose` is never silently ignored.
+
+        Args:
+            msg (str): The message format string.
+            *args: The arguments merged into `msg`.
+        """
+        if self._log.isEnabledFor(logging.INFO):
+            self._log.info(msg, *args)
+        else:
+            print(msg % args)
 
     def _send(self, cmd, channel, response_bytes=None):
         """
@@ -176,14 +257,61 @@ class MCM3000Controller:
             AssertionError: If the stage for the specified channel is not initialized.
         """
         assert self.stages[self._internal_channels_dict[channel]] is not None, (f'{self.name}: channel {channel}: stage = None (cannot send command)')
-        self.port.write(cmd)
-        if response_bytes is not None:
-            response = self.port.read(response_bytes)
-        else:
-            response = None
-        assert self.port.inWaiting() == 0
+        with self._port_lock:
+            self.port.write(cmd)
+            if response_bytes is not None:
+                response = self._read(response_bytes)
+            else:
+                response = None
+            if self.very_verbose: # Checking that no reply bytes are left costs one extra driver call per command
+                assert self.port.in_waiting == 0
         return response
 
+    def _send_fast(self, cmd, response_bytes=None):
+        """
+        Sends a command and reads its reply without the checks done by `_send`.
+
+        Meant for internal hot paths (i.e. encoder polling while finishing a move) whose caller has already validated
+        the channel, so the stage check and the unread bytes check are skipped.
+
+        Args:
+            cmd (bytes): The command to be sent to the motor controller.
+            response_bytes (int, optional): The number of bytes to read from the response. If None, no response is read.
+
+        Returns:
+            bytes or None: The response from the controller if `response_bytes` is not None, otherwise None.
+        """
+        with self._port_lock:
+            self.port.write(cmd)
+            return self._read(response_bytes) if response_bytes is not None else None
+
+    def _read(self, response_bytes):
+        """
+        Reads exactly the specified number of reply bytes from the motor controller.
+
+        The port reads with a short timeout, so a slow or partial reply is read again until it is complete or
+        `_read_timeout_s` has elapsed, instead of handing a short reply to the decoding (or blocking indefinitely).
+
+        Args:
+            response_bytes (int): The number of bytes to read.
+
+        Returns:
+            bytes: The reply from the controller.
+
+        Raises:
+            IOError: If the complete reply does not arrive within `_read_timeout_s`.
+        """
+        response = self.port.read(response_bytes)
+        if len(response) == response_bytes: # Usual case, the whole reply in one read
+            return response
+        response = bytearray(response)
+        deadline = time.monotonic() + self._read_timeout_s
+        while len(response) < response_bytes and time.monotonic() < deadline:
+            response += self.port.read(response_bytes - len(response))
+        if len(response) != response_bytes:
+            raise IOError(f'{self.name}: incomplete reply ({len(response)} of {response_bytes} bytes)')
+        return bytes(response)
+
     def _get_encoder_value(self, channel, verbose = False):
         """
         Retrieves the current encoder value for a specified channel.
@@ -203,17 +331,43 @@ class MCM3000Controller:
         Raises:
             AssertionError: If the specified channel is not available.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        channel_byte = self._internal_channels_dict[channel].to_bytes(1, byteorder='little')
-        cmd = b'\x0a\x04' + channel_byte + b'\x00\x00\x00'
-        response = self._send(cmd, channel, response_bytes=12)
-        assert response[6:7] == channel_byte # channel = selected
-        encoder_value = int.from_bytes(
-            response[-4:], byteorder='little', signed=True)
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        response = self._send(self._get_encoder_cmd[idx], channel, response_bytes=12)
+        channel_byte, encoder_value = _encoder_reply.unpack(response)
+        assert channel_byte == self._channel_byte[idx] # channel = selected
         if verbose:
-            print(f'\n{self.name}: ch{channel} -> stage encoder value = {encoder_value}')
+            self._log_verbose('%s: ch%s -> stage encoder value = %s', self.name, channel, encoder_value)
         return encoder_value
 
+    def _get_all_encoder_values(self, verbose=False):
+        """
+        Retrieves the current encoder values of all the channels with a stage, in a single serial round trip.
+
+        The encoder queries of all the active channels are written back to back and their replies are read with a
+        single read, instead of one write/read round trip per channel. Each reply is assigned to its channel from the
+        channel byte it echoes, so the replies do not need to come back in the order of the queries.
+
+        Args:
+            verbose (bool, optional): If True, prints the retrieved encoder values to the terminal. Defaults to False.
+
+        Returns:
+            dict: The current encoder value of each active channel, keyed by channel.
+        """
+        with self._port_lock:
+            self.port.write(self._get_all_encoders_cmd)
+            response = self._read(_encoder_reply.size*len(self._active_idx))
+            if self.very_verbose: # Checked under the lock, before another thread can send a command
+                assert self.port.in_waiting == 0
+        encoder_values = {}
+        for offset in range(0, len(response), _encoder_reply.size):
+            channel_byte, encoder_value = _encoder_reply.unpack_from(response, offset)
+            encoder_values[self._channel_from_byte[channel_byte]] = encoder_value
+        assert len(encoder_values) == len(self._active_idx) # one reply per queried channel
+        if verbose:
+            self._log_verbose('%s: stage encoder values = %s', self.name, encoder_values)
+        return encoder_values
+
     def _reverse_limit_signs(self, channel):
         """
         Reverses the sign of the motion limit values for a specified channel.
@@ -229,14 +383,39 @@ class MCM3000Controller:
         Raises:
             AssertionError: If the specified channel is not available.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
         # Set lower and upper limit (these are the max and min points that the stage can physically do)
-        self._stage_upper_limit_um[self._internal_channels_dict[channel]] = -self._stage_upper_limit_um[self._internal_channels_dict[channel]]
-        self._stage_lower_limit_um[self._internal_channels_dict[channel]] = -self._stage_lower_limit_um[self._internal_channels_dict[channel]]
+        self._stage_upper_limit_um[idx] = -self._stage_upper_limit_um[idx]
+        self._stage_lower_limit_um[idx] = -self._stage_lower_limit_um[idx]
         # Set scan points and retract points (for initializing they are just the same as max points)
-        self._stage_highest_scan_point_um[self._internal_channels_dict[channel]] = -self._stage_highest_scan_point_um[self._internal_channels_dict[channel]]
-        self._stage_lowest_scan_point_um[self._internal_channels_dict[channel]] = -self._stage_lowest_scan_point_um[self._internal_channels_dict[channel]]
-        self._stage_retract_point_um[self._internal_channels_dict[channel]] = -self._stage_retract_point_um[self._internal_channels_dict[channel]]
+        self._stage_highest_scan_point_um[idx] = -self._stage_highest_scan_point_um[idx]
+        self._stage_lowest_scan_point_um[idx] = -self._stage_lowest_scan_point_um[idx]
+        self._stage_retract_point_um[idx] = -self._stage_retract_point_um[idx]
+        self._signed_retract_um[idx] = self._stage_retract_point_um[idx]*self.reverse_factors[idx]
+        self._update_effective_limits(idx)
+
+    def _update_effective_limits(self, idx):
+        """
+        Recomputes the bounds used to legalize the moves of an internal channel.
+
+        Each bound is the scan point if it is set, otherwise the stage limit. Must be called whenever a limit or scan
+        point of the channel changes.
+
+        Args:
+            idx (int): The internal index of the channel.
+        """
+        # Check if there is a lowest scanning point, if not it refers to the limit
+        lower_limit_um = self._stage_lowest_scan_point_um[idx]
+        if not lower_limit_um:
+            lower_limit_um = self._stage_lower_limit_um[idx]
+        # Check if there is a highest scanning point, if not it refers to the limit
+        upper_limit_um = self._stage_highest_scan_point_um[idx]
+        if not upper_limit_um:
+            upper_limit_um = self._stage_upper_limit_um[idx]
+        # Reversed stages have lower > upper, so moves are compared against the sorted pair
+        lo_um, hi_um = (lower_limit_um, upper_limit_um) if lower_limit_um <= upper_limit_um else (upper_limit_um, lower_limit_um)
+        self._effective_limits[idx] = (lower_limit_um, upper_limit_um, lo_um, hi_um)
 
 
     def _set_encoder_value_to_zero(self, channel):
@@ -247,7 +426,7 @@ class MCM3000Controller:
         recalibrating the position measurement. It warns that after zeroing, the limits
         are no longer valid and should be reset unless the zeroing is done at the center
         of its range. The method waits until the encoder value is confirmed to be reset
-        to zero before returning.
+        to zero before returning, polling it every `_min_polling_wait_s`.
 
         Args:
             channel (int): The channel for which to set the encoder value to zero.
@@ -257,25 +436,30 @@ class MCM3000Controller:
 
         Raises:
             AssertionError: If the specified channel is not available.
+            IOError: If the encoder does not read zero within `_zero_timeout_s`.
 
         Note:
             After zeroing, it's essential to reset the motion limits, unless the zeroing
             operation was performed at the center of the stage's range.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        if self.verbose:
-            encoder_value = self._get_encoder_value(channel, verbose = self.verbose)
-        channel_byte = self._internal_channels_dict[channel].to_bytes(2, byteorder='little')
-        encoder_bytes = (0).to_bytes(4, 'little', signed=True) # set to zero
-        cmd = b'\x09\x04\x06\x00\x00\x00' + channel_byte + encoder_bytes
-        self._send(cmd, channel)
-        if self.verbose:
-            print(f'{self.name}: ch{channel} -> waiting for re-set to zero')
-        while True:
-            if self._get_encoder_value(channel, verbose=self.verbose) == 0: break
-        self._current_encoder_value[self._internal_channels_dict[channel]] = 0
-        if self.verbose:
-            print(f'{self.name}: ch{channel} -> done with encoder re-set')
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        with self._channel_locks[idx]: # Not while this channel is moving
+            if self._pending_mask & (1 << idx):
+                self._finish_move(channel)
+            if self._log.isEnabledFor(logging.INFO): # Logs the encoder value before the re-set (costs a serial read)
+                self._get_encoder_value(channel, verbose=True)
+            self._send(self._zero_encoder_cmd[idx], channel)
+            self._log.info('%s: ch%s -> waiting for re-set to zero', self.name, channel)
+            timeout = time.monotonic() + self._zero_timeout_s
+            n_polls = 1
+            while self._get_encoder_value(channel) != 0: # Waits between polls, releasing the GIL to other threads
+                if time.monotonic() > timeout:
+                    raise IOError(f'{self.name}: ch{channel} -> encoder not re-set to zero after {n_polls} polls')
+                time.sleep(self._min_polling_wait_s)
+                n_polls += 1
+            self._current_encoder_value[idx] = 0
+        self._log.info('%s: ch%s -> done with encoder re-set after %s polls', self.name, channel, n_polls)
         return None
 
     def _move_to_encoder_value(self, channel, encoder_value, block=True):
@@ -290,58 +474,212 @@ class MCM3000Controller:
         Returns:
             None
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        if self._pending_encoder_value[self._internal_channels_dict[channel]] is not None:
-            self._finish_move(channel)
-        encoder_bytes = encoder_value.to_bytes(4, 'little', signed=True)
-        channel_bytes = self._internal_channels_dict[channel].to_bytes(2, byteorder='little')
-        cmd = b'\x53\x04\x06\x00\x00\x00' + channel_bytes + encoder_bytes
-        self._send(cmd, channel)
-        self._pending_encoder_value[self._internal_channels_dict[channel]] = encoder_value
-        if self.very_verbose:
-            print(f'{self.name}: ch{channel} -> moving stage encoder to value = {encoder_value}')
-        if block:
-            self._finish_move(channel)
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        with self._channel_locks[idx]:
+            if self._pending_mask & (1 << idx):
+                self._finish_move(channel)
+            if encoder_value == self._current_encoder_value[idx]: # Already there, skip the command and the polling
+                return None
+            cmd = _channel_cmd.pack(_move_cmd_header, idx, encoder_value)
+            with self._port_lock:
+                self._send(cmd, channel)
+                self._pending_encoder_value[idx] = encoder_value
+                self._pending_mask |= 1 << idx
+            self._log.debug('%s: ch%s -> moving stage encoder to value = %s', self.name, channel, encoder_value)
+            if block:
+                self._finish_move(channel)
         return None
 
-    def _finish_move(self, channel, polling_wait_s=0.1, verbose=False):
+    def _poll_move(self, channel, polling_wait_s=0.1, verbose=False):
         """
-        Finish the movement of the specified channel and update the current encoder value and position.
+        Polls the encoder of the specified channel until the pending move is finished or times out.
+
+        This is a generator shared by `_finish_move` and `finish_move_async`: it yields the time to wait before the
+        next poll and leaves the waiting itself to the caller, so the same loop can block (time.sleep) or yield to an
+        event loop (asyncio.sleep). When it is exhausted, the current encoder value is updated and the pending move is
+        cleared.
 
         Args:
             channel (str): The channel to finish the movement for.
-            polling_wait_s (float, optional): The time to wait between polling the encoder value. Defaults to 0.1.
-            verbose (bool, optional): Whether to print verbose output. Defaults to False.
+            polling_wait_s (float, optional): The maximum time to wait between polling the encoder value. Defaults to 0.1.
+            verbose (bool, optional): Whether to print the number of polls (logged at DEBUG level otherwise). Defaults to False.
 
-        Returns:
-            tuple: A tuple containing the current encoder value and the current position in um.
+        Yields:
+            float: The time to wait, in seconds, before polling the encoder again.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        if self._pending_encoder_value[self._internal_channels_dict[channel]] is None:
-            return
-        current_encoder_value = self._get_encoder_value(channel, verbose = False)
-        timeout = time.time() + 6 # 6s timeout, measured to be max time between top and bottom motions
+        idx = self._internal_channels_dict[channel]
+        target_encoder_value = self._pending_encoder_value[idx]
+        # Loop invariants bound to locals so each poll only pays for the serial round trip
+        send_fast, get_encoder_cmd = self._send_fast, self._get_encoder_cmd[idx]
+        unpack, reply_bytes, channel_byte = _encoder_reply.unpack, _encoder_reply.size, self._channel_byte[idx]
+        min_polling_wait_s, sec_per_count = self._min_polling_wait_s, self._sec_per_count
+        now = time.monotonic
+        timeout = now() + 6 # 6s timeout, measured to be max time between top and bottom motions
+        n_polls = 0
         while True:
-            if current_encoder_value == self._pending_encoder_value[self._internal_channels_dict[channel]]: #FIRST VERSION
-            # if abs(current_encoder_value - self._pending_encoder_value[self._internal_channels_dict[channel]]) <= 1 : # Check that error is smaller than resolution (i.e. one encoder value)
+            n_polls += 1
+            reply_channel_byte, current_encoder_value = unpack(send_fast(get_encoder_cmd, reply_bytes))
+            assert reply_channel_byte == channel_byte # channel = selected
+            if current_encoder_value == target_encoder_value: #FIRST VERSION
+            # if abs(current_encoder_value - target_encoder_value) <= 1 : # Check that error is smaller than resolution (i.e. one encoder value)
                 break
-            if time.time() > timeout:
-                print(f"\033[93m\nMCM3000 motion timed out\033[0m") # TODO double check requirements that is close enough
-                position_error = current_encoder_value - self._pending_encoder_value[self._internal_channels_dict[channel]] # position error in enconder counts
+            if now() > timeout:
+                self._log.warning('%s: ch%s -> motion timed out', self.name, channel) # TODO double check requirements that is close enough
+                position_error = current_encoder_value - target_encoder_value # position error in enconder counts
                 if abs(position_error) > 1:
-                    print(f"\033[91m\nMCM3000 position error: {position_error} counts \033[0m")
+                    self._log.error('%s: ch%s -> position error: %s counts', self.name, channel, position_error)
                 break
-            if verbose: print('.', end='')
-            time.sleep(polling_wait_s)
-            current_encoder_value = self._get_encoder_value(channel, verbose = False)
-        self._current_encoder_value[self._internal_channels_dict[channel]] = current_encoder_value
+            # Wait about half of the estimated remaining motion time, so short moves are not delayed by a full polling period
+            remaining_counts = abs(target_encoder_value - current_encoder_value)
+            yield max(min_polling_wait_s, min(polling_wait_s, 0.5*remaining_counts*sec_per_count))
+        if verbose:
+            self._log_verbose('%s: ch%s -> move finished after %s polls', self.name, channel, n_polls)
+        else:
+            self._log.debug('%s: ch%s -> move finished after %s polls', self.name, channel, n_polls)
+        self._current_encoder_value[idx] = current_encoder_value
+        self._pending_encoder_value[idx] = None
+        with self._port_lock:
+            self._pending_mask &= ~(1 << idx)
+
+    def _finished_move_result(self, channel, verbose=False):
+        """
+        Returns the final encoder value and position of a finished move.
+
+        Args:
+            channel (str): The channel that finished moving.
+            verbose (bool, optional): Whether to print verbose output. Defaults to False.
+
+        Returns:
+            tuple: A tuple containing the current encoder value and the current position in um.
+        """
+        current_encoder_value = self._current_encoder_value[self._internal_channels_dict[channel]]
         current_position_um = self._um_from_encoder_value(
             channel, current_encoder_value)
         if verbose:
-            print(f'\n{self.name}: ch{channel} -> finished moving to position_um = {current_position_um}')
-        self._pending_encoder_value[self._internal_channels_dict[channel]] = None
+            self._log_verbose('%s: ch%s -> finished moving to position_um = %s', self.name, channel, current_position_um)
         return current_encoder_value, current_position_um
 
+    def _finish_move(self, channel, polling_wait_s=0.1, verbose=False):
+        """
+        Finish the movement of the specified channel and update the current encoder value and position.
+
+        Args:
+            channel (str): The channel to finish the movement for.
+            polling_wait_s (float, optional): The maximum time to wait between polling the encoder value. Defaults to 0.1.
+            verbose (bool, optional): Whether to print verbose output. Defaults to False.
+
+        Returns:
+            tuple: A tuple containing the current encoder value and the current position in um.
+        """
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        with self._channel_locks[idx]:
+            if not self._pending_mask & (1 << idx):
+                return
+            for wait_s in self._poll_move(channel, polling_wait_s, verbose):
+                time.sleep(wait_s)
+            return self._finished_move_result(channel, verbose)
+
+    async def finish_move_async(self, channel, polling_wait_s=0.1, verbose=False):
+        """
+        Asynchronous version of `_finish_move`.
+
+        Waits between encoder polls with asyncio.sleep instead of time.sleep, so the event loop keeps running other
+        tasks (e.g. camera acquisition) while the stage is moving. Use it after a non-blocking move
+        (`move_um(..., block=False)`). Several channels can be awaited together with asyncio.gather: each poll is a
+        complete write/read on the port, and tasks only switch while waiting between polls.
+
+        Args:
+            channel (str): The channel to finish the movement for.
+            polling_wait_s (float, optional): The maximum time to wait between polling the encoder value. Defaults to 0.1.
+            verbose (bool, optional): Whether to print verbose output. Defaults to False.
+
+        Returns:
+            tuple: A tuple containing the current encoder value and the current position in um.
+        """
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        if not self._pending_mask & (1 << idx):
+            return
+        for wait_s in self._poll_move(channel, polling_wait_s, verbose):
+            await asyncio.sleep(wait_s)
+        return self._finished_move_result(channel, verbose)
+
+    def _finish_move_multi(self, channels, polling_wait_s=0.1, verbose=False):
+        """
+        Finish the movements of several channels, polling all of them in a single serial round trip per poll.
+
+        Args:
+            channels (iterable): The channels to finish the movement for (channels without a pending move are skipped).
+            polling_wait_s (float, optional): The maximum time to wait between polling the encoder values. Defaults to 0.1.
+            verbose (bool, optional): Whether to print verbose output. Defaults to False.
+
+        Returns:
+            dict: The current encoder value and the current position in um of each finished channel, keyed by channel.
+        """
+        moving = {}
+        for channel in channels:
+            idx = self._internal_channels_dict.get(channel)
+            assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+            if self._pending_mask & (1 << idx):
+                moving[channel] = idx
+        finished = list(moving)
+        timeout = time.monotonic() + 6 # 6s timeout, measured to be max time between top and bottom motions
+        n_polls = 0
+        while moving:
+            n_polls += 1
+            encoder_values = self._get_all_encoder_values()
+            timed_out = time.monotonic() > timeout
+            remaining_counts = 0
+            for channel, idx in list(moving.items()):
+                current_encoder_value = encoder_values[channel]
+                target_encoder_value = self._pending_encoder_value[idx]
+                if current_encoder_value != target_encoder_value:
+                    if not timed_out:
+                        remaining_counts = max(remaining_counts, abs(target_encoder_value - current_encoder_value))
+                        continue
+                    self._log.warning('%s: ch%s -> motion timed out', self.name, channel)
+                    position_error = current_encoder_value - target_encoder_value # position error in enconder counts
+                    if abs(position_error) > 1:
+                        self._log.error('%s: ch%s -> position error: %s counts', self.name, channel, position_error)
+                self._current_encoder_value[idx] = current_encoder_value
+                self._pending_encoder_value[idx] = None
+                with self._port_lock:
+                    self._pending_mask &= ~(1 << idx)
+                del moving[channel]
+            if moving:
+                # Wait about half of the estimated remaining motion time of the slowest channel
+                time.sleep(max(self._min_polling_wait_s, min(polling_wait_s, 0.5*remaining_counts*self._sec_per_count)))
+        if verbose:
+            self._log_verbose('%s: ch%s -> moves finished after %s polls', self.name, finished, n_polls)
+        else:
+            self._log.debug('%s: ch%s -> moves finished after %s polls', self.name, finished, n_polls)
+        return {channel: self._finished_move_result(channel, verbose) for channel in finished}
+
+    def is_pending(self, channel):
+        """
+        Checks if the specified channel has a move in progress (i.e. not finished with `_finish_move`).
+
+        Args:
+            channel (str): The channel to check.
+
+        Returns:
+            bool: True if the channel has a pending move, False otherwise.
+        """
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        return bool(self._pending_mask & (1 << idx))
+
+    def any_pending(self):
+        """
+        Checks if any channel has a move in progress.
+
+        Returns:
+            bool: True if at least one channel has a pending move, False otherwise.
+        """
+        return bool(self._pending_mask)
+
     def _um_from_encoder_value(self, channel, encoder_value):
         """
         Converts the encoder value to micrometers (um) based on the channel and the stage conversion factor.
@@ -353,10 +691,8 @@ class MCM3000Controller:
         Returns:
             float: The converted value in micrometers (um).
         """
-        um = encoder_value * self._stage_conversion_um[self._internal_channels_dict[channel]]
-        if self.reverse[self._internal_channels_dict[channel]]:
-            um = -um
-        return um + 0  # avoid -0.0
+        um = encoder_value * self._um_per_count[self._internal_channels_dict[channel]]
+        return um if um else 0.0  # avoid -0.0
 
     def _encoder_value_from_um(self, channel, um):
         """
@@ -367,58 +703,104 @@ class MCM3000Controller:
             um (float): The distance in micrometers to convert.
 
         Returns:
-            int: The encoder value corresponding to the given distance in micrometers.
+            int: The encoder value corresponding to the given distance in micrometers (nearest count).
         """
-        encoder_value = int(um / self._stage_conversion_um[self._internal_channels_dict[channel]])
-        if self.reverse[self._internal_channels_dict[channel]]:
-            encoder_value = -encoder_value
-        return encoder_value + 0  # avoid -0.0
+        return round(um / self._um_per_count[self._internal_channels_dict[channel]])
 
-    def _check_min_motion(self, channel, target_encoder_value):
+    def _check_min_motion(self, channel, idx, target_encoder_value, reference_encoder_value, lo_um, hi_um):
         """
-        Check if the desired motion is smaller than the minimum motion and, if so, move out to be able to move back in.
+        Check if the desired motion is smaller than the minimum motion and, if so, move out and back in to the target.
+
+        Very small motions are not reliably done by the stage, so they are done as a move out by an overshoot of 10 um
+        (towards the inside of the limits) followed by the move back to the target, both blocking. If the limits leave
+        no room for 10 um on either side, the move out goes to the farthest limit instead. Both moves are issued here,
+        so the caller has nothing left to move.
 
         Args:
             channel (str): The channel to check the motion for.
-            target_encoder_value (float): The target encoder value to check against.
+            idx (int): The internal index of the channel.
+            target_encoder_value (int): The target encoder value to check against (already within the limits).
+            reference_encoder_value (int): The encoder value the motion starts from (pending target, or current value).
+            lo_um (float): The lowest allowed position in micrometers.
+            hi_um (float): The highest allowed position in micrometers.
 
         Returns:
-            bool: True if it is necessary to move, False otherwise.
+            bool: True if the caller still has to move, False if the stage was moved in position here.
         """
-        if self._pending_encoder_value[self._internal_channels_dict[channel]]:
-            if target_encoder_value == self._pending_encoder_value[self._internal_channels_dict[channel]]:
-                return False
-            elif abs(target_encoder_value - self._pending_encoder_value[self._internal_channels_dict[channel]]) <= self._min_encoder_motion:
-                self.move_um(channel, 10, relative=True, block=True, verbose=False)
-        else:
-            if target_encoder_value == self._current_encoder_value[self._internal_channels_dict[channel]]:
-                return False
-            elif abs(target_encoder_value - self._current_encoder_value[self._internal_channels_dict[channel]]) <= self._min_encoder_motion:
-                self.move_um(channel, 10, relative=True, block=True, verbose=False)
-        return True
-
+        if abs(target_encoder_value - reference_encoder_value) > self._min_encoder_motion:
+            return True
+        um_per_count = self._um_per_count[idx]
+        overshoot_encoder_value = int(10 / um_per_count)
+        # Encoder values within the limits (reversed stages have a negative um_per_count)
+        lowest_um_in_counts, highest_um_in_counts = sorted((lo_um / um_per_count, hi_um / um_per_count))
+        lowest_encoder_value, highest_encoder_value = math.ceil(lowest_um_in_counts), math.floor(highest_um_in_counts)
+        for out_encoder_value in (reference_encoder_value + overshoot_encoder_value, reference_encoder_value - overshoot_encoder_value):
+            if lowest_encoder_value <= out_encoder_value <= highest_encoder_value:
+                break
+        else: # Limits narrower than the overshoot: move out as far as they allow
+            if highest_encoder_value - reference_encoder_value >= reference_encoder_value - lowest_encoder_value:
+                out_encoder_value = highest_encoder_value
+            else:
+                out_encoder_value = lowest_encoder_value
+        self._log.debug('%s: ch%s -> motion below %s counts, moving out and back in', self.name, channel, self._min_encoder_motion)
+        self._move_to_encoder_value(channel, out_encoder_value, block=True)
+        self._move_to_encoder_value(channel, target_encoder_value, block=True)
+        return False
 
-    def get_position_um(self, channel, verbose=False):
+    def get_position_um(self, channel, verbose=False, force=False):
         """
         Get the position in micrometers (um) for the specified channel.
 
+        While the channel is not moving, the position is the cached encoder value (updated at every finished move), so
+        no serial read is done. During a move, or with `force`, the encoder is read from the controller.
+
         Args:
             channel (str): The channel for which to get the position.
             verbose (bool, optional): If True, print the stage position in micrometers. Defaults to False.
+            force (bool, optional): If True, always read the encoder (i.e. if the stage may have been moved from the
+                controller knobs) and update the cached value. Defaults to False.
 
         Returns:
             float: The stage position in micrometers.
 
         Raises:
-            AssertionError: If the specified channel is not available.
+            AssertionError: If the specified channel is not available or has no stage.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        encoder_value = self._get_encoder_value(channel, verbose=False)
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        assert self.stages[idx] is not None, (f'{self.name}: channel {channel}: stage = None (cannot send command)')
+        with self._port_lock: # Not the channel lock, so the position can be read while another thread waits for a move
+            if force or self._pending_mask & (1 << idx):
+                encoder_value = self._get_encoder_value(channel, verbose=False)
+                if not self._pending_mask & (1 << idx):
+                    self._current_encoder_value[idx] = encoder_value
+            else:
+                encoder_value = self._current_encoder_value[idx]
         position_um = self._um_from_encoder_value(channel, encoder_value)
         if verbose:
-            print(f'{self.name}: ch{channel} -> stage position_um = {position_um}')
+            self._log_verbose('%s: ch%s -> stage position_um = %s', self.name, channel, position_um)
         return position_um
 
+    def get_positions_um(self, verbose=False):
+        """
+        Get the position in micrometers (um) of all the channels with a stage, in a single serial round trip.
+
+        Args:
+            verbose (bool, optional): If True, print the stage positions in micrometers. Defaults to False.
+
+        Returns:
+            dict: The stage position in micrometers for each channel, keyed by channel label.
+        """
+        channels_dict = self._internal_channels_dict
+        um_per_count = self._um_per_count
+        positions_um = {}
+        for channel, encoder_value in self._get_all_encoder_values(verbose=False).items():
+            um = encoder_value * um_per_count[channels_dict[channel]]
+            positions_um[channel] = um if um else 0.0  # avoid -0.0
+        if verbose:
+            self._log_verbose('%s: stage positions_um = %s', self.name, positions_um)
+        return positions_um
+
     def set_stage_limit_um(self, channel, lower_limit=True, limit_um=None):
         """
         Set the limit of a stage motion for a specified channel.
@@ -430,33 +812,33 @@ class MCM3000Controller:
 
         Returns:
             float: The target limit value in micrometers.
+
+        Raises:
+            ValueError: If the limit is outside the stage limits.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
         # Set the limit of a stage motion for a specified channel
         if limit_um:
             target_limit_um = limit_um
         else:
-            target_limit_um = self.get_position_um(channel, verbose = self.very_verbose)
-        if self.reverse[self._internal_channels_dict[channel]]:
-            assert self._stage_lower_limit_um[self._internal_channels_dict[channel]] >= target_limit_um >= self._stage_upper_limit_um[self._internal_channels_dict[channel]], (
-                f'{self.name}: ch{channel} -> requested limit ({target_limit_um}) exceeds the stage limits ([{self._stage_lower_limit_um[self._internal_channels_dict[channel]]},{self._stage_upper_limit_um[self._internal_channels_dict[channel]]}])')
-        else:
-            assert self._stage_lower_limit_um[self._internal_channels_dict[channel]] <= target_limit_um <= self._stage_upper_limit_um[self._internal_channels_dict[channel]], (
-                f'{self.name}: ch{channel} -> requested limit ({target_limit_um}) exceeds the stage limits ([{self._stage_lower_limit_um[self._internal_channels_dict[channel]]},{self._stage_upper_limit_um[self._internal_channels_dict[channel]]}])')
+            target_limit_um = self.get_position_um(channel, verbose = self.very_verbose, force=True)
+        lower_limit_um, upper_limit_um = self._stage_lower_limit_um[idx], self._stage_upper_limit_um[idx]
+        lo_um, hi_um = (lower_limit_um, upper_limit_um) if lower_limit_um <= upper_limit_um else (upper_limit_um, lower_limit_um) # Reversed stages have lower > upper
+        if not lo_um <= target_limit_um <= hi_um:
+            raise ValueError(
+                f'{self.name}: ch{channel} -> requested limit ({target_limit_um}) exceeds the stage limits ([{lower_limit_um},{upper_limit_um}])')
         if lower_limit:
-            self._stage_lowest_scan_point_um = target_limit_um
-            if self.verbose:
-                print(f'{self.name}: ch{channel} -> stage lowest scan point set to: {target_limit_um} um' )
+            self._stage_lowest_scan_point_um[idx] = target_limit_um
+            self._update_effective_limits(idx)
+            self._log.info('%s: ch%s -> stage lowest scan point set to: %s um', self.name, channel, target_limit_um)
         else:
-            self._stage_highest_scan_point_um = target_limit_um
-            if self.verbose:
-                print(f'{self.name}: ch{channel} -> stage highest scan point set to: {target_limit_um} um' )
-            if self.reverse[self._internal_channels_dict[channel]]:
-                if self._stage_retract_point_um < self._stage_highest_scan_point_um:
-                    self.set_retract_point_um(self, channel, self._stage_highest_scan_point_um[self._internal_channels_dict[channel]])
-            else:
-                if self._stage_retract_point_um > self._stage_highest_scan_point_um:
-                    self.set_retract_point_um(self, channel, self._stage_highest_scan_point_um[self._internal_channels_dict[channel]])
+            self._stage_highest_scan_point_um[idx] = target_limit_um
+            self._update_effective_limits(idx)
+            self._log.info('%s: ch%s -> stage highest scan point set to: %s um', self.name, channel, target_limit_um)
+            # Bring the retract point down to the new highest scan point if it is above it (the reverse factor orients the comparison)
+            if (self._stage_retract_point_um[idx] - target_limit_um)*self.reverse_factors[idx] > 0:
+                self.set_retract_point_um(channel, target_limit_um)
         return target_limit_um
 
 
@@ -471,10 +853,11 @@ class MCM3000Controller:
         Returns:
             float: The stage retract point in micrometers for the specified channel.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
         if verbose:
-            print(f'{self.name}: ch{channel} -> stage retract point = {self._stage_retract_point_um[self._internal_channels_dict[channel]]} um')
-        return self._stage_retract_point_um[self._internal_channels_dict[channel]]
+            self._log_verbose('%s: ch%s -> stage retract point = %s um', self.name, channel, self._stage_retract_point_um[idx])
+        return self._stage_retract_point_um[idx]
 
     def set_retract_point_um(self, channel, retract_um_pos=None, relative=False, verbose=False):
         """
@@ -488,25 +871,29 @@ class MCM3000Controller:
 
         Returns:
             float: The target retract position in micrometers.
+
+        Raises:
+            ValueError: If the retract position is outside the scan points.
         """
 
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
         # Set the retract position of a stage motion for a specified channel
         if retract_um_pos:
             target_retract_um = retract_um_pos
             if relative:
-                target_retract_um = target_retract_um + self.get_position_um(channel)
+                target_retract_um = target_retract_um + self.get_position_um(channel, force=True)
         else:
-            target_retract_um = self.get_position_um(channel)
-        if self.reverse[self._internal_channels_dict[channel]]:
-            assert self._stage_lowest_scan_point_um[self._internal_channels_dict[channel]] <= target_retract_um <= self._stage_highest_scan_point_um[self._internal_channels_dict[channel]], (
-                f'{self.name}: ch{channel} -> requested retract point ({target_retract_um}) exceeds the stage limits ([{self._stage_lowest_scan_point_um[self._internal_channels_dict[channel]]},{self._stage_highest_scan_point_um[self._internal_channels_dict[channel]]}])')
-        else:
-            assert self._stage_lowest_scan_point_um[self._internal_channels_dict[channel]] >= target_retract_um >= self._stage_highest_scan_point_um[self._internal_channels_dict[channel]], (
-                f'{self.name}: ch{channel} -> requested retract point ({target_retract_um}) exceeds the stage limits ([{self._stage._lowest_scan_point_um[self._internal_channels_dict[channel]]},{self._stage_highest_scan_point_um[self._internal_channels_dict[channel]]}])')
-        self._stage_retract_point_um = target_retract_um
+            target_retract_um = self.get_position_um(channel, force=True)
+        lowest_um, highest_um = self._stage_lowest_scan_point_um[idx], self._stage_highest_scan_point_um[idx]
+        lo_um, hi_um = (lowest_um, highest_um) if lowest_um <= highest_um else (highest_um, lowest_um) # Reversed stages have lowest > highest
+        if not lo_um <= target_retract_um <= hi_um:
+            raise ValueError(
+                f'{self.name}: ch{channel} -> requested retract point ({target_retract_um}) exceeds the stage limits ([{lowest_um},{highest_um}])')
+        self._stage_retract_point_um[idx] = target_retract_um
+        self._signed_retract_um[idx] = target_retract_um*self.reverse_factors[idx]
         if verbose:
-            print(f'{self.name}: ch{channel} -> stage retract point set to: {target_retract_um} um' )
+            self._log_verbose('%s: ch%s -> stage retract point set to: %s um', self.name, channel, target_retract_um)
         return target_retract_um
 
     def legalize_move_um(self, channel, move_um, relative=True, verbose=True):
@@ -520,41 +907,86 @@ class MCM3000Controller:
             verbose (bool, optional): Whether to print verbose output. Defaults to True.
 
         Returns:
-            float: The legalized move in micrometers (um) if it is within the boundaries, None otherwise.
+            float: The legalized move in micrometers (um), None if there is no need to move.
+
+        Raises:
+            ValueError: If the move is outside the boundaries.
+        """
+        return self._legalize_move(channel, move_um, relative, verbose)[0]
+
+    def _target_move(self, channel, move_um, relative=True):
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        target_encoder_value = self._encoder_value_from_um(channel, move_um)
+        Computes the target of the desired motion and checks that it is within the accepted boundaries.
+
+        Args:
+            channel (str): The channel to perform the motion on.
+            move_um (float): The desired motion in micrometers (um).
+            relative (bool, optional): Whether the motion is relative or absolute. Defaults to True.
+
+        Returns:
+            tuple: The target in micrometers (um), the target encoder value and the encoder value the motion starts from.
+
+        Raises:
+            AssertionError: If the specified channel is not available.
+            ValueError: If the move is outside the boundaries.
+        """
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        # Conversions done inline with the channel's signed factor (same as _encoder_value_from_um/_um_from_encoder_value)
+        um_per_count = self._um_per_count[idx]
+        target_encoder_value = round(move_um / um_per_count)
+        # Motions start from the target of the pending move or, if none, from the current position
+        pending_encoder_value = self._pending_encoder_value[idx]
+        reference_encoder_value = pending_encoder_value if pending_encoder_value is not None else self._current_encoder_value[idx]
         if relative:
-            if self._pending_encoder_value[self._internal_channels_dict[channel]]:
-                target_encoder_value += self._pending_encoder_value[self._internal_channels_dict[channel]]
-            else:
-                target_encoder_value += self._current_encoder_value[self._internal_channels_dict[channel]]
-        # Check that want to move beyond the minimum number of counts and, if not, do the motion back and forth
-        if not self._check_min_motion(channel, target_encoder_value): return None
+            target_encoder_value += reference_encoder_value
         # Set the target motion in um
-        target_move_um = self._um_from_encoder_value(channel, target_encoder_value) # This might produce a slight difference between move_un and target, due to the need to have an encoder value, but since afterwards it checks if the error is smaller than the resolution, all good
-        # Check if there is a lowest scanning point, if not it refers to the limit
-        if self._stage_lowest_scan_point_um[self._internal_channels_dict[channel]]:
-            lower_limit_um = self._stage_lowest_scan_point_um[self._internal_channels_dict[channel]]
-        else:
-            lower_limit_um = self._stage_lower_limit_um[self._internal_channels_dict[channel]]
-        # Check if there is a highest scanning point, if not it refers to the limit
-        if self._stage_highest_scan_point_um[self._internal_channels_dict[channel]]:
-            upper_limit_um = self._stage_highest_scan_point_um[self._internal_channels_dict[channel]]
-        else:
-            upper_limit_um = self._stage_upper_limit_um[self._internal_channels_dict[channel]]
-        # Check that value is within boundaries
-        if self.reverse[self._internal_channels_dict[channel]]:
-            assert lower_limit_um >= target_move_um >= upper_limit_um, (
-                f'{self.name}: ch{channel} -> requested move_um ({target_move_um}) exceeds the limit_um ([{lower_limit_um},{upper_limit_um}])')
-        else:
-            assert lower_limit_um <= target_move_um <= upper_limit_um, (
+        target_move_um = target_encoder_value * um_per_count or 0.0 # (avoid -0.0) This might produce a slight difference between move_un and target, due to the need to have an encoder value, but since afterwards it checks if the error is smaller than the resolution, all good
+        # Check that value is within boundaries (scan points, or limits if there are none, see _update_effective_limits)
+        lower_limit_um, upper_limit_um, lo_um, hi_um = self._effective_limits[idx]
+        if not lo_um <= target_move_um <= hi_um:
+            # Rounding to the nearest count can cross a limit the requested position is within: step one count back inside
+            requested_um = move_um + reference_encoder_value*um_per_count if relative else move_um
+            if lo_um <= requested_um <= hi_um:
+                target_encoder_value += -1 if (target_move_um > hi_um) == (um_per_count > 0) else 1
+                target_move_um = target_encoder_value * um_per_count or 0.0
+        if not lo_um <= target_move_um <= hi_um: # An assert would be skipped when running with -O
+            raise ValueError(
                 f'{self.name}: ch{channel} -> requested move_um ({target_move_um}) exceeds the limit_um ([{lower_limit_um},{upper_limit_um}])')
+        return target_move_um, target_encoder_value, reference_encoder_value
+
+    def _legalize_move(self, channel, move_um, relative=True, verbose=True, target=None):
+        """
+        Checks if the desired motion is within the accepted boundaries (see `legalize_move_um`).
+
+        Args:
+            channel (str): The channel to perform the motion on.
+            move_um (float): The desired motion in micrometers (um).
+            relative (bool, optional): Whether the motion is relative or absolute. Defaults to True.
+            verbose (bool, optional): Whether to print verbose output. Defaults to True.
+            target (tuple, optional): The already checked target of the motion (see `_target_move`). Defaults to None.
+
+        Returns:
+            tuple: The legalized move in micrometers (um) and its target encoder value, (None, None) if there is no
+                need to move, or (legalized move, None) if the stage was already moved in position (minimum motion).
+
+        Raises:
+            ValueError: If the move is outside the boundaries.
+        """
+        if target is None:
+            target = self._target_move(channel, move_um, relative)
+        target_move_um, target_encoder_value, reference_encoder_value = target
+        if target_encoder_value == reference_encoder_value: # Already in position
+            return None, None
         legal_move_um = target_move_um
         if verbose:
-            print(f'{self.name}: ch{channel} -> legalized move_um = {legal_move_um}'  +
-                  f'({move_um} requested, relative={relative})')
-        return legal_move_um
+            self._log_verbose('%s: ch%s -> legalized move_um = %s (%s requested, relative=%s)', self.name, channel, legal_move_um, move_um, relative)
+        # Check that want to move beyond the minimum number of counts and, if not, do the motion back and forth
+        idx = self._internal_channels_dict[channel]
+        lo_um, hi_um = self._effective_limits[idx][2:]
+        if not self._check_min_motion(channel, idx, target_encoder_value, reference_encoder_value, lo_um, hi_um):
+            return legal_move_um, None
+        return legal_move_um, target_encoder_value
 
     def move_um(self, channel, move_um, relative=True, block=True, verbose=False):
         """
@@ -572,25 +1004,65 @@ class MCM3000Controller:
 
         Raises:
             AssertionError: If the specified channel is not available.
+            ValueError: If the move is outside the boundaries.
 
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        legal_move_um = self.legalize_move_um(channel, move_um, relative, verbose=verbose)
-        if not legal_move_um: # If there is no need to move
-            if self.verbose:
-                print(f'No need to move, already in position {self.get_position_um(channel, verbose = False)} um ({move_um} um was requested))')
-            return
-        if self.verbose:
-            print(f'{self.name}: ch{channel} -> moving to position_um = {legal_move_um}', end='\n')
-        encoder_value = self._encoder_value_from_um(channel, legal_move_um)
-        self._move_to_encoder_value(channel, encoder_value, block)
-        if block:
-            self._finish_move(channel, verbose=verbose)
-        else:
-            print('\n')
-        if verbose:
-            print(f"Channel {channel} in position {self.get_position_um(channel, False)}")
-        return legal_move_um
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        with self._channel_locks[idx]: # Legalized against this channel's state, which no other thread changes until moved
+            legal_move_um, encoder_value = self._legalize_move(channel, move_um, relative, verbose=verbose)
+            if legal_move_um is None: # If there is no need to move (a legal move to 0.0 um still moves)
+                if verbose or self._log.isEnabledFor(logging.INFO):
+                    # Target of the pending move or, if none, the last read position: no serial read needed
+                    pending_encoder_value = self._pending_encoder_value[idx]
+                    encoder_value = pending_encoder_value if pending_encoder_value is not None else self._current_encoder_value[idx]
+                    self._log_verbose('%s: ch%s -> no need to move, already in position %s um (%s um was requested)',
+                                      self.name, channel, self._um_from_encoder_value(channel, encoder_value), move_um)
+                return
+            if encoder_value is not None: # Otherwise already moved in position (minimum motion, see _check_min_motion)
+                self._log.info('%s: ch%s -> moving to position_um = %s', self.name, channel, legal_move_um)
+                self._move_to_encoder_value(channel, encoder_value, block=False) # Finished below, with the requested verbose
+                if block:
+                    self._finish_move(channel, verbose=verbose)
+            if verbose:
+                self._log_verbose('%s: ch%s -> in position %s um', self.name, channel, self.get_position_um(channel, False))
+            return legal_move_um
+
+    def move_um_multi(self, moves_um, relative=True, block=True, verbose=False):
+        """
+        Moves several channels together by the given distances in micrometers.
+
+        All the moves are checked against their limits first, so a move exceeding them raises before any stage moves.
+        The moves are then legalized (moves below the minimum motion are done while legalizing, see
+        `_check_min_motion`) and the remaining commands are sent back to back so the stages move at the same time and,
+        if blocking, all the moving channels are polled together until they finish.
+
+        Args:
+            moves_um (dict): The distance to move in micrometers for each channel, keyed by channel.
+            relative (bool, optional): If True, the movements are relative to the current positions. If False, they are absolute. Defaults to True.
+            block (bool, optional): If True, the method blocks until all the movements are completed. Defaults to True.
+            verbose (bool, optional): If True, additional information about the movements is printed. Defaults to False.
+
+        Returns:
+            dict: The legalized position in micrometers for each channel (None if there was no need to move).
+
+        Raises:
+            AssertionError: If a channel is not available.
+            ValueError: If a move is outside the boundaries.
+        """
+        with contextlib.ExitStack() as stack:
+            # Channel locks are always taken in internal index order, so concurrent multi-channel moves cannot deadlock
+            for idx in sorted({self._internal_channels_dict[channel] for channel in moves_um if channel in self._internal_channels_dict}):
+                stack.enter_context(self._channel_locks[idx])
+            checked = {channel: self._target_move(channel, move_um, relative) for channel, move_um in moves_um.items()}
+            targets = {channel: self._legalize_move(channel, moves_um[channel], relative, verbose, checked[channel]) for channel in checked}
+            for channel, (legal_move_um, encoder_value) in targets.items():
+                if encoder_value is not None: # Nothing left to move if not needed or already moved in position
+                    self._log.info('%s: ch%s -> moving to position_um = %s', self.name, channel, legal_move_um)
+                    self._move_to_encoder_value(channel, encoder_value, block=False)
+            if block:
+                self._finish_move_multi(targets, verbose=verbose)
+        return {channel: legal_move_um for channel, (legal_move_um, encoder_value) in targets.items()}
 
     def move_zero(self, channel, block=True):
         """
@@ -603,9 +1075,8 @@ class MCM3000Controller:
         Returns:
             bool: True if the movement was successful, False otherwise.
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        if self.verbose:
-            print(f'{self.name}: ch{channel} -> Moving to Zero', end='')
+        assert channel in self._internal_channels_dict, (f'{self.name}: channel \'{channel}\' not available')
+        self._log.info('%s: ch%s -> Moving to Zero', self.name, channel)
         return self.move_um(channel, 0, relative=False, block=block)
 
     def retract(self, channel):
@@ -619,10 +1090,10 @@ class MCM3000Controller:
             AssertionError: If the specified channel is not available.
 
         """
-        assert channel in self.channels, (f'{self.name}: channel \'{channel}\' not available')
-        if self.verbose:
-            print(f'{self.name}: ch{channel} -> Moving to RETRACT position', end='\n')
-        self.move_um(channel, self._stage_retract_point_um[self._internal_channels_dict[channel]]*self.reverse_factors[self._internal_channels_dict[channel]], relative=False)
+        idx = self._internal_channels_dict.get(channel)
+        assert idx is not None, (f'{self.name}: channel \'{channel}\' not available')
+        self._log.info('%s: ch%s -> Moving to RETRACT position', self.name, channel)
+        self.move_um(channel, self._signed_retract_um[idx], relative=False)
 
 
     def close(self):
@@ -631,9 +1102,9 @@ class MCM3000Controller:
 
         This method closes the connection to the MCM3000 controller by closing the port.
         """
-        if self.verbose: print(f'{self.name}: closing...', end=' ')
+        self._log.info('%s: closing...', self.name)
         self.port.close()
-        if self.verbose: print(f"{self.name} CLOSED.")
+        self._log.info('%s: CLOSED.', self.name)
         return None
 
 if __name__ == '__main__':
@@ -729,7 +1200,6 @@ if __name__ == '__main__':
 
     # Test motion time from the limits
     if False:
-        from datetime import datetime
         print(f'Stage Lower Limit: {stage_controller._stage_lower_limit_um[chnl]} um')
         print(f'Stage Upper Limit: {stage_controller._stage_upper_limit_um[chnl]} um')
         while True:
@@ -739,12 +1209,11 @@ if __name__ == '__main__':
                     stage_controller.move_um(channel=chnl, move_um=-stage_controller._stage_lower_limit_um[chnl], relative=False,
                                             verbose=True)
                     time.sleep(2)
-                    move_start_time = datetime.now()
+                    move_start_ns = time.perf_counter_ns()
                     stage_controller.move_um(channel=chnl, move_um=-stage_controller._stage_upper_limit_um[chnl], relative=False,
                                             verbose=True)
-                    move_elapsed_time = datetime.now() - move_start_time
-                    move_elapsed_seconds = move_elapsed_time.total_seconds()
-                    print(f'Motion finished in {move_elapsed_time.total_seconds()} s')
+                    move_elapsed_seconds = (time.perf_counter_ns() - move_start_ns) / 1e9
+                    print(f'Motion finished in {move_elapsed_seconds} s')
                 break
             elif response.lower().strip() == 'q':
                 break
@@ -0,0 +1,350 @@
+"""
+Regression tests for the controllers.
+
+The controller modules are loaded from their files, and the MCM3000 controller talks to a simulated controller
+(FakeSerial) instead of a real serial port, so no hardware or pyserial is needed.
+"""
+
+import csv
+import importlib.util
+import os
+import struct
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+src_path = Path(__file__).resolve().parents[1] / 'src' / 'braman' / 'controller'
+objective_list_csv_path = Path(__file__).resolve().parents[1] / 'config' / 'B_Raman_Objectives_List.csv'
+
+
+def _load_module(name, path):
+    """
+    Loads a module from its file, without importing the package it belongs to.
+
+    Args:
+        name (str): The name to give to the module.
+        path (Path): The path to the module file.
+
+    Returns:
+        module: The loaded module.
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeSerial:
+    """
+    Simulates the MCM3000 replies to the encoder query (0x0a), set encoder (0x09) and move (0x53) commands.
+
+    A moving stage advances `step` encoder counts towards its target every time its encoder is queried.
+    """
+    step = 400
+
+    def __init__(self, port=None, baudrate=None, timeout=None, **kwargs):
+        self.encoder_values = [0, 0, 0]
+        self.targets = [None, None, None]
+        self.move_targets = [] # Every (idx, encoder value) a move was commanded to
+        self.buffer = bytearray()
+        self.writes = 0
+
+    def write(self, cmd):
+        self.writes += 1
+        i = 0
+        while i < len(cmd):
+            if cmd[i] == 0x0a:
+                idx = cmd[i + 2]
+                self._advance(idx)
+                self.buffer += b'\x0b\x04\x06\x00\x00\x00' + bytes([idx, 0]) + struct.pack('<i', self.encoder_values[idx])
+                i += 6
+            elif cmd[i] in (0x09, 0x53):
+                idx, encoder_value = struct.unpack_from('<Hi', cmd, i + 6)
+                if cmd[i] == 0x09:
+                    self.encoder_values[idx] = encoder_value
+                else:
+                    self.targets[idx] = encoder_value
+                    self.move_targets.append((idx, encoder_value))
+                i += 12
+            else:
+                raise ValueError(f'unexpected command {bytes(cmd)}')
+        return len(cmd)
+
+    def _advance(self, idx):
+        target = self.targets[idx]
+        if target is None:
+            return
+        if abs(target - self.encoder_values[idx]) <= self.step:
+            self.encoder_values[idx], self.targets[idx] = target, None
+        else:
+            self.encoder_values[idx] += self.step if target > self.encoder_values[idx] else -self.step
+
+    def read(self, size=1):
+        response = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return response
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def set_low_latency_mode(self, low_latency_settings):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(scope='module')
+def mcm3000():
+    """The mcm3000_controller module, loaded with a fake pyserial that opens FakeSerial ports."""
+    fake_serial = types.ModuleType('serial')
+    fake_serial.Serial = FakeSerial
+    fake_serial.serialutil = types.SimpleNamespace(SerialException=OSError)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, 'serial', fake_serial)
+        module = _load_module('mcm3000_controller', src_path / 'z_stage' / 'z_controllers' / 'mcm3000_controller.py')
+    return module
+
+
+@pytest.fixture
+def controller(mcm3000, monkeypatch):
+    """An MCM3000 controller with stages on channels 1 and 2, polling without waiting."""
+    monkeypatch.setattr(mcm3000.time, 'sleep', lambda s: None)
+    return mcm3000.MCM3000Controller('COM3', stages=('ZFM2020', 'ZFM2020', None), verbose=False)
+
+
+def test_move_zero_moves_to_zero(controller):
+    controller.move_um(1, 100, relative=False)
+    assert controller.move_zero(1) == 0.0
+    assert controller.port.encoder_values[0] == 0
+    assert controller.get_position_um(1, force=True) == 0.0
+
+
+def test_set_encoder_value_to_zero(controller):
+    legal_move_um = controller.move_um(1, 100, relative=False)
+    controller._set_encoder_value_to_zero(1)
+    assert controller.port.encoder_values[0] == 0
+    assert controller.get_position_um(1) == 0.0
+    assert controller.move_um(1, -100, relative=False) == pytest.approx(-legal_move_um)
+
+
+def test_set_encoder_value_to_zero_times_out(controller, monkeypatch):
+    write = controller.port.write
+    monkeypatch.setattr(controller.port, 'write', lambda cmd: None if cmd[0] == 0x09 else write(cmd)) # Re-set ignored
+    controller.move_um(1, 100, relative=False)
+    controller._zero_timeout_s = 0.01
+    with pytest.raises(IOError, match='not re-set to zero'):
+        controller._set_encoder_value_to_zero(1)
+
+
+def test_move_um_returns_none_when_already_in_position(controller):
+    controller.move_um(1, 100, relative=False)
+    writes = controller.port.writes
+    assert controller.move_um(1, 0) is None
+    assert controller.port.writes == writes
+
+
+def test_move_um_below_minimum_motion_returns_legalized_move(controller):
+    conversion_um = controller._stage_conversion_um[0]
+    encoder_value = round(controller.move_um(1, 100, relative=False)/conversion_um)
+    # A 1 count move is done while legalizing, as a move out and back in
+    assert controller.move_um(1, conversion_um) == pytest.approx((encoder_value + 1)*conversion_um)
+    assert controller.port.encoder_values[0] == encoder_value + 1
+    assert controller.port.move_targets[-2:] == [(0, encoder_value + round(10/conversion_um)), (0, encoder_value + 1)]
+
+
+@pytest.mark.parametrize('position_um', [-2, 2, 4])
+def test_move_um_below_minimum_motion_stays_within_scan_points(controller, position_um):
+    conversion_um = controller._stage_conversion_um[0]
+    controller.set_stage_limit_um(1, lower_limit=True, limit_um=-3)
+    controller.set_stage_limit_um(1, lower_limit=False, limit_um=5)
+    controller.move_um(1, position_um, relative=False)
+    controller.move_um(1, 2*conversion_um)
+    assert all(-3 <= encoder_value*conversion_um <= 5 for idx, encoder_value in controller.port.move_targets)
+    assert controller.port.encoder_values[0] == round(position_um/conversion_um) + 2
+
+
+def test_set_stage_limit_um_only_sets_its_channel(controller):
+    controller.set_stage_limit_um(2, lower_limit=False, limit_um=100)
+    controller.set_stage_limit_um(2, lower_limit=True, limit_um=-100)
+    assert controller._stage_highest_scan_point_um[1] == 100
+    assert controller._stage_lowest_scan_point_um[1] == -100
+    assert controller._stage_highest_scan_point_um[0] == controller._stage_upper_limit_um[0]
+    assert controller._stage_lowest_scan_point_um[0] == controller._stage_lower_limit_um[0]
+    assert controller.get_retract_point_um(2) == 100
+    controller.move_um(1, 200, relative=False)
+    with pytest.raises(ValueError):
+        controller.move_um(2, 200, relative=False)
+    with pytest.raises(ValueError):
+        controller.move_um(2, -200, relative=False)
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+@pytest.mark.parametrize('limit_um', [12700, -12700])
+def test_legalize_move_um_at_the_stage_limits(mcm3000, monkeypatch, reverse, limit_um):
+    monkeypatch.setattr(mcm3000.time, 'sleep', lambda s: None)
+    controller = mcm3000.MCM3000Controller('COM3', stages=('ZFM2020', None, None), reverse=(reverse, False, False), verbose=False)
+    conversion_um = controller._stage_conversion_um[0]
+    # The nearest count is beyond the limit, so the count next to it inside is used
+    for relative in (False, True):
+        legal_move_um = controller.legalize_move_um(1, limit_um, relative=relative, verbose=False)
+        assert 12700 - conversion_um < legal_move_um*(limit_um/12700) <= 12700
+    with pytest.raises(ValueError):
+        controller.legalize_move_um(1, limit_um*1.0001, relative=False, verbose=False)
+
+
+def test_move_um_to_a_scan_point(controller):
+    conversion_um = controller._stage_conversion_um[0]
+    controller.set_stage_limit_um(1, lower_limit=False, limit_um=100.1)
+    controller.set_stage_limit_um(1, lower_limit=True, limit_um=-100.1)
+    assert 100.1 - conversion_um < controller.move_um(1, 100.1, relative=False) <= 100.1
+    assert -100.1 <= controller.move_um(1, -100.1, relative=False) < -100.1 + conversion_um
+    with pytest.raises(ValueError):
+        controller.move_um(1, 100.2, relative=False)
+
+
+def test_move_um_multi_out_of_bounds_moves_nothing(controller):
+    controller.move_um_multi({1: 50, 2: 30}, relative=False)
+    writes = controller.port.writes
+    with pytest.raises(ValueError):
+        controller.move_um_multi({1: controller._stage_conversion_um[0], 2: 1e6})
+    assert controller.port.writes == writes
+
+
+def test_get_position_um_without_stage(controller):
+    with pytest.raises(AssertionError, match='stage = None'):
+        controller.get_position_um(3)
+
+
+def test_get_position_um_reads_the_encoder_only_when_forced(controller):
+    controller.move_um(1, 100, relative=False)
+    position_um = controller.get_position_um(1)
+    controller.port.encoder_values[0] += 10 # i.e. moved from the controller knobs
+    writes = controller.port.writes
+    assert controller.get_position_um(1) == position_um
+    assert controller.port.writes == writes
+    assert controller.get_position_um(1, force=True) == pytest.approx(position_um + 10*controller._stage_conversion_um[0])
+    assert controller.get_position_um(1) == pytest.approx(position_um + 10*controller._stage_conversion_um[0])
+
+
+def test_read_completes_a_split_reply(controller, monkeypatch):
+    read = controller.port.read
+    monkeypatch.setattr(controller.port, 'read', lambda size=1: read(min(size, 5)))
+    legal_move_um = controller.move_um(1, 100, relative=False)
+    assert controller.get_position_um(1, force=True) == legal_move_um
+
+
+def test_read_raises_on_a_short_reply(controller, monkeypatch):
+    write = controller.port.write
+    def write_dropping_last_byte(cmd):
+        write(cmd)
+        del controller.port.buffer[-1:]
+    monkeypatch.setattr(controller.port, 'write', write_dropping_last_byte)
+    controller._read_timeout_s = 0.01
+    with pytest.raises(IOError, match='incomplete reply'):
+        controller.get_position_um(1, force=True)
+
+
+def test_get_positions_um_routes_replies_by_channel_byte(controller, monkeypatch):
+    controller.move_um_multi({1: 50, 2: 30}, relative=False)
+    positions_um = controller.get_positions_um()
+    write = controller.port.write
+    def write_reversing_replies(cmd):
+        write(cmd)
+        buffer = controller.port.buffer
+        controller.port.buffer = bytearray().join(reversed([buffer[i:i + 12] for i in range(0, len(buffer), 12)]))
+    monkeypatch.setattr(controller.port, 'write', write_reversing_replies)
+    assert controller.get_positions_um() == positions_um
+    assert positions_um[1] != positions_um[2]
+
+
+@pytest.fixture(scope='module')
+def b_raman_objective():
+    """The b_raman_objetive module."""
+    return _load_module('b_raman_objetive', src_path / 'objective' / 'b_raman_objetive.py')
+
+
+def _objective_rows():
+    with open(objective_list_csv_path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize('row', _objective_rows(), ids=lambda row: row['Name'])
+def test_objective_getters_match_catalog(b_raman_objective, row):
+    objective = b_raman_objective.BRamanObjective(row['Name'])
+    assert objective.get_name() == row['Name']
+    assert objective.get_maker() == row['Maker']
+    assert objective.get_magnification() == float(row['Magnification'])
+    assert objective.get_NA() == float(row['NA'])
+    assert objective.get_WD() == float(row['WD'])
+    assert objective.get_immersion() == row['Immersion']
+    assert objective.get_f_tube_lens_design() == float(row['Tube_Lens_Design'])
+
+
+def test_objective_setter_updates_getter(b_raman_objective):
+    name = _objective_rows()[0]['Name']
+    objective = b_raman_objective.BRamanObjective.get(name)
+    objective.set_WD(1.5)
+    assert objective.get_WD() == 1.5
+    assert objective.get_metadata()['Objective_WD'] == 1.5
+    assert b_raman_objective.BRamanObjective.get(name).get_WD() == float(_objective_rows()[0]['WD'])
+
+
+def test_missing_objective_catalog(b_raman_objective):
+    with pytest.raises(FileNotFoundError, match='Objective catalog not found'):
+        b_raman_objective.BRamanObjective.load_all('missing.csv')
+    with pytest.raises(FileNotFoundError, match='Objective catalog not found'):
+        b_raman_objective.BRamanObjective.load_many([], 'missing.csv')
+
+
+def test_load_many_objectives(b_raman_objective):
+    names = [row['Name'] for row in _objective_rows()][:2]
+    assert [objective.get_name() for objective in b_raman_objective.BRamanObjective.load_many(names)] == names
+    with pytest.raises(Exception, match=r"\['missing'\] are not in the database"):
+        b_raman_objective.BRamanObjective.load_many(names + ['missing'])
+
+
+def test_objective_catalog_ignores_an_older_parquet_copy(b_raman_objective, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    pa = pytest.importorskip('pyarrow')
+    csv_path = tmp_path / 'objectives.csv'
+    csv_path.write_bytes(objective_list_csv_path.read_bytes())
+    rows = _objective_rows()
+    pq.write_table(pa.Table.from_pylist([dict(row, Maker='PARQUET') for row in rows]), csv_path.with_suffix('.parquet'))
+    name = rows[0]['Name']
+    # Parquet copy newer than the CSV: read instead of the CSV
+    os.utime(csv_path, (0, 0))
+    b_raman_objective._load_objective_table.cache_clear()
+    assert b_raman_objective._load_objective_table(csv_path)[name]['Maker'] == 'PARQUET'
+    # CSV edited after the Parquet copy was written: the stale copy is ignored
+    os.utime(csv_path)
+    os.utime(csv_path.with_suffix('.parquet'), (0, 0))
+    b_raman_objective._load_objective_table.cache_clear()
+    assert b_raman_objective._load_objective_table(csv_path)[name]['Maker'] == rows[0]['Maker']
+
+
+class _FakeSpectrometer:
+    spectro_model = 'EAGLE'
+    exc_wl_nm = 785
+
+    def __init__(self, intensity):
+        self.intensity = intensity
+
+    def get_raw_spectrum(self):
+        return self.intensity
+
+
+def test_spectrum_df_does_not_modify_the_cached_calibration(tmp_path, monkeypatch):
+    pytest.importorskip('pandas')
+    base_spectrometer = _load_module('base_spectrometer', src_path / 'spectrometer' / 'base_spectrometer.py')
+    (tmp_path / 'EAGLE_PixeltoLambdatoCM_1.csv').write_text('Pixel,Lambda,Excitation,CM\n0,800.0,785,238.9\n1,801.0,785,254.5\n')
+    monkeypatch.setattr(base_spectrometer, 'calibration_folder_path', str(tmp_path))
+    spectrometer = type('Spectrometer', (_FakeSpectrometer, base_spectrometer.BRamanSpectrometerController), {})
+    df = spectrometer([10, 20]).get_spectrum_df()
+    assert list(df.columns) == ['Pixel', 'Lambda', 'CM', 'Intensity']
+    assert list(df['Intensity']) == [10, 20]
+    assert list(spectrometer([30, 40]).get_spectrum_df()['Intensity']) == [30, 40]
+    assert 'Intensity' not in base_spectrometer._load_calibration('EAGLE', 785).columns